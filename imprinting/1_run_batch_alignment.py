@@ -1,56 +1,505 @@
 import subprocess
 import argparse
+import hashlib
 import os
+import mmap
+import shutil
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def run_minimap2(target_fasta, query_fasta, output_paf):
-    """Runs minimap2 for whole-genome alignment with -K 4G option.
+FASTA_SUFFIXES = (".fasta", ".fa", ".fna")
+COMPRESSED_SUFFIXES = (".gz", ".bgz")
+COMPRESSED_FASTA_SUFFIXES = tuple(f + c for f in FASTA_SUFFIXES for c in COMPRESSED_SUFFIXES)
+MINIMAP2_PRESET = "asm5"  # Recommended preset for assembly-to-reference alignment
+STREAM_BUFFER_SIZE = 1 << 20  # 1 MiB
+SIZE_UNITS = {"k": 10 ** 3, "m": 10 ** 6, "g": 10 ** 9}  # Same units minimap2 uses for -K/-I
+
+def resolve_executable(name):
+    """Returns the absolute path of an executable on PATH, or name if it is not found.
+
+    The lookup happens once here, so the child no longer searches PATH on every
+    spawn. This does not change how subprocess forks: with the default
+    close_fds=True it never uses posix_spawn, and its vfork use does not depend
+    on the path. An unresolved name is returned unchanged so the usual
+    FileNotFoundError is still raised.
+    """
+    return shutil.which(name) or name
+
+def open_decompressed_stream(path, decompressors):
+    """Returns a /dev/fd path streaming the decompressed contents of a gzipped file.
+
+    minimap2 inflates gzipped input on a single thread; decompressing with
+    pigz in a separate process keeps that work off minimap2's reader. The
+    pigz output pipe must be passed to minimap2 with pass_fds. A pipe can
+    only be read once, so this is only suitable for the target, and only
+    without --split-prefix. Paths that are not compressed, or any path when
+    pigz is unavailable, are returned unchanged.
+
+    Args:
+        path (str): Path to a possibly compressed FASTA file.
+        decompressors (list): Started pigz processes are appended here.
+    """
+    pigz = shutil.which("pigz")
+    if not path.endswith(COMPRESSED_SUFFIXES) or pigz is None:
+        return path
+    proc = subprocess.Popen([pigz, "-dc", path], stdout=subprocess.PIPE)
+    decompressors.append(proc)
+    return f"/dev/fd/{proc.stdout.fileno()}"
+
+def decompress_to_file(path, dest_dir):
+    """Decompresses a gzipped FASTA file into dest_dir with pigz and returns its path.
+
+    Queries are re-read by minimap2 once per index part and again when
+    merging --split-prefix results, so they need a real file rather than a
+    pipe. Paths that are not compressed, or any path when pigz is
+    unavailable, are returned unchanged.
+    """
+    pigz = shutil.which("pigz")
+    if not path.endswith(COMPRESSED_SUFFIXES) or pigz is None:
+        return path
+    dest = os.path.join(dest_dir, "query.fa")
+    with open(dest, "wb") as outfile:
+        subprocess.run([pigz, "-dc", path], stdout=outfile, check=True)
+    return dest
+
+def run_with_decompressors(command, decompressors):
+    """Runs command with the decompressors' output pipes passed through to it.
+
+    Raises CalledProcessError if the command or any decompressor fails. The
+    decompressors are always reaped before returning.
+
+    Args:
+        command (list): Command line, referring to the pipes via /dev/fd paths.
+        decompressors (list): pigz processes from open_decompressed_stream.
+    """
+    try:
+        proc = subprocess.Popen(command, pass_fds=[d.stdout.fileno() for d in decompressors])
+        for decompressor in decompressors:
+            decompressor.stdout.close()  # The child holds its own copy of the pipe
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, command)
+        # A truncated or corrupt .gz still ends in a clean EOF for the reader
+        for decompressor in decompressors:
+            if decompressor.wait() != 0:
+                raise subprocess.CalledProcessError(decompressor.returncode, decompressor.args)
+    finally:
+        for decompressor in decompressors:
+            if decompressor.poll() is None:
+                decompressor.kill()  # The child stopped reading early
+            decompressor.wait()
+
+def run_minimap2(target_fasta, query_fasta, output_paf, threads=1,
+                 batch_size="4g", index_batch="8g", cap_kalloc="2000m", split_dir=None):
+    """Runs minimap2 for whole-genome alignment.
+
+    minimap2 writes to a temporary file that replaces output_paf only on
+    success, so a failed run never leaves a PAF that looks up to date.
 
     Args:
         target_fasta (str): Path to the target (reference) FASTA file (hg38).
         query_fasta (str): Path to the query (de novo assembly) FASTA file.
         output_paf (str): Path to the output PAF file.
+        threads (int): Number of minimap2 worker threads (-t).
+        batch_size (str): Bases loaded into memory per mapping batch (-K).
+        index_batch (str): Bases loaded into memory to build the index (-I).
+        cap_kalloc (str): Per-thread kalloc memory cap (--cap-kalloc).
+        split_dir (str): Directory in which a private temporary directory is
+            created for minimap2's --split-prefix files. Defaults to the system
+            temporary directory.
+
+    Returns:
+        bool: True if minimap2 completed successfully.
     """
+    tmpdir = tempfile.mkdtemp(prefix="mm2_", dir=split_dir)
+    tmp_paf = output_paf + ".tmp"
+    decompressors = []
     try:
+        query_input = decompress_to_file(query_fasta, tmpdir)
+        target_input = open_decompressed_stream(target_fasta, decompressors)
         command = [
-            "minimap2",
-            "-ax", "asm5",  # Recommended preset for assembly-to-reference alignment
-            "-secondary=no",  # Suppress secondary alignments
-            "-K", "4G",      # Added option for larger k-mer table
-            target_fasta,
-            query_fasta,
-            "-o", output_paf
+            resolve_executable("minimap2"),
+            "-ax", MINIMAP2_PRESET,
+            "--secondary=no",  # Suppress secondary alignments
+            "-t", str(threads),  # Worker threads for this job
+            "-K", batch_size,  # Query bases per mapping batch
+            "-I", index_batch,  # Reference bases per index part
+            "--cap-kalloc", cap_kalloc,  # Bound per-thread memory retained between batches
         ]
+        if target_input == target_fasta:
+            # Spill multi-part index results to disk; the merge pass re-opens the
+            # inputs, so this is skipped when the target is a one-shot pipe
+            command += ["--split-prefix", os.path.join(tmpdir, "split")]
+        command += [target_input, query_input, "-o", tmp_paf]
         print(f"Running command: {' '.join(command)}")
-        subprocess.run(command, check=True)
+        run_with_decompressors(command, decompressors)
+        os.replace(tmp_paf, output_paf)
         print(f"Successfully generated PAF file: {output_paf}")
+        return True
     except subprocess.CalledProcessError as e:
-        print(f"Error running minimap2: {e}")
+        if os.path.exists(output_paf):
+            os.remove(output_paf)
+        print(f"Error running {os.path.basename(e.cmd[0])}: {e}")
     except FileNotFoundError:
         print("Error: minimap2 not found in your PATH. Please ensure it is installed.")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        if os.path.exists(tmp_paf):
+            os.remove(tmp_paf)
+    return False
+
+def build_minimap2_index(target_fasta, index_dir, index_batch="8g", threads=1):
+    """Builds a minimap2 .mmi index for the target once and returns its path.
+
+    The index file name records a hash of the target's resolved path and the
+    preset and -I value it was built with, and it is rebuilt only when missing
+    or older than the target. Indexing reads the target once, so a gzipped
+    target is streamed through pigz. If the target already is an .mmi file,
+    or indexing fails, target_fasta is returned unchanged.
+
+    Args:
+        target_fasta (str): Path to the target (reference) FASTA file (hg38).
+        index_dir (str): Directory in which to store the index.
+        index_batch (str): Reference bases per index part (-I).
+        threads (int): Threads used while indexing (-t).
+    """
+    if target_fasta.endswith(".mmi"):
+        return target_fasta
+    name = os.path.basename(target_fasta)
+    for suffix in COMPRESSED_SUFFIXES + FASTA_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    # Key on the resolved target path so same-named references never share an index
+    digest = hashlib.sha1(os.path.realpath(target_fasta).encode()).hexdigest()[:12]
+    index_path = os.path.join(index_dir, f"{name}.{digest}.{MINIMAP2_PRESET}.I{index_batch}.mmi")
+    if is_up_to_date(index_path, target_fasta):
+        print(f"Reusing minimap2 index: {index_path}")
+        return index_path
+
+    tmp_path = index_path + ".tmp"
+    decompressors = []
+    try:
+        command = [
+            resolve_executable("minimap2"),
+            "-x", MINIMAP2_PRESET,
+            "-I", index_batch,
+            "-t", str(threads),
+            "-d", tmp_path,
+            open_decompressed_stream(target_fasta, decompressors)
+        ]
+        print(f"Building minimap2 index: {' '.join(command)}")
+        run_with_decompressors(command, decompressors)
+        os.replace(tmp_path, index_path)
+        print(f"Successfully built minimap2 index: {index_path}")
+        return index_path
+    except subprocess.CalledProcessError as e:
+        print(f"Error building minimap2 index, aligning against the FASTA instead: {e}")
+    except FileNotFoundError:
+        print("Error: minimap2 not found in your PATH. Please ensure it is installed.")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return target_fasta
+
+def parse_size(size):
+    """Converts a minimap2 size string such as "4g" or "500m" to a number of bases."""
+    size = str(size).strip().lower()
+    if size and size[-1] in SIZE_UNITS:
+        return int(float(size[:-1]) * SIZE_UNITS[size[-1]])
+    return int(float(size))
+
+def group_queries(worklist, max_bases):
+    """Greedily groups worklist items so each group's FASTA size fits max_bases.
+
+    Compressed queries are never grouped, since their size on disk says
+    little about their length.
+
+    Args:
+        worklist (list): (target, query, output) tuples.
+        max_bases (int): Upper bound on the combined query file size per group.
 
-def process_directories(target_fasta, input_dir, output_dir):
+    Returns:
+        list: Lists of (target, query, output) tuples.
+    """
+    groups, current, current_size = [], [], 0
+    for item in worklist:
+        query = item[1]
+        if query.endswith(COMPRESSED_SUFFIXES):
+            groups.append([item])
+            continue
+        size = os.path.getsize(query)
+        if current and current_size + size > max_bases:
+            groups.append(current)
+            current, current_size = [], 0
+        current.append(item)
+        current_size += size
+    if current:
+        groups.append(current)
+    return groups
+
+def write_tagged_queries(query_fastas, tagged_fasta):
+    """Concatenates several FASTA files with contig names tagged "asm_<i>|".
+
+    Args:
+        query_fastas (list): Paths of the FASTA files to concatenate.
+        tagged_fasta (str): Path to the combined output FASTA file.
+    """
+    with open(tagged_fasta, "wb", buffering=STREAM_BUFFER_SIZE) as outfile:
+        for i, query_fasta in enumerate(query_fastas):
+            tag = b">asm_%d|" % i
+            previous = b"\n"
+            with open(query_fasta, "rb") as infile:
+                while True:
+                    block = infile.read(STREAM_BUFFER_SIZE)
+                    if not block:
+                        break
+                    tagged = block.replace(b"\n>", b"\n" + tag)
+                    if previous == b"\n" and block[:1] == b">":
+                        tagged = tag + tagged[1:]
+                    outfile.write(tagged)
+                    previous = block[-1:]
+            if previous != b"\n":
+                outfile.write(b"\n")
+
+def split_tagged_output(combined_paf, output_pafs):
+    """Splits a combined minimap2 output back into one file per assembly.
+
+    Records are routed by their "asm_<i>|" query-name tag, which is removed.
+    SAM header lines are copied to every output. The outputs are written to
+    temporary files and only moved into place once the whole split succeeds.
+
+    Args:
+        combined_paf (str): Path to the combined minimap2 output.
+        output_pafs (list): Output paths, indexed by assembly tag.
+    """
+    tmp_pafs = [path + ".tmp" for path in output_pafs]
+    try:
+        outfiles = []
+        try:
+            for tmp_paf in tmp_pafs:
+                outfiles.append(open(tmp_paf, "wb", buffering=STREAM_BUFFER_SIZE))
+            with open(combined_paf, "rb") as infile:
+                for line in infile:
+                    if line[:1] == b"@":
+                        for outfile in outfiles:
+                            outfile.write(line)
+                        continue
+                    tag, _, rest = line.partition(b"|")
+                    outfiles[int(tag[4:])].write(rest)
+        finally:
+            for outfile in outfiles:
+                outfile.close()
+        for tmp_paf, output_paf in zip(tmp_pafs, output_pafs):
+            os.replace(tmp_paf, output_paf)
+    finally:
+        for tmp_paf in tmp_pafs:
+            if os.path.exists(tmp_paf):
+                os.remove(tmp_paf)
+
+def presort_query(query_fasta, sorted_dir):
+    """Returns a longest-first copy of query_fasta cached in sorted_dir.
+
+    The copy is keyed on a hash of the query's resolved path and rebuilt only
+    when it is older than the query. Compressed queries are returned
+    unchanged, since sorting needs random access.
+    """
+    if query_fasta.endswith(COMPRESSED_SUFFIXES):
+        return query_fasta
+    # Key on the resolved query path so same-named assemblies never share a copy
+    digest = hashlib.sha1(os.path.realpath(query_fasta).encode()).hexdigest()[:12]
+    sorted_fasta = os.path.join(sorted_dir, f"{digest}_{os.path.basename(query_fasta)}")
+    if not is_up_to_date(sorted_fasta, query_fasta):
+        print(f"Sorting contigs of '{os.path.basename(query_fasta)}' longest-first...")
+        sort_fasta_by_length(query_fasta, sorted_fasta)
+    return sorted_fasta
+
+def run_minimap2_group(target_fasta, query_fastas, output_pafs, sorted_dir=None, **options):
+    """Aligns several assemblies with a single minimap2 run.
+
+    The queries are concatenated into one tagged FASTA for a single minimap2
+    process, so the target index is loaded once for the whole group. The
+    combined output is then split into one file per assembly.
+
+    Args:
+        target_fasta (str): Path to the target (reference) FASTA file (hg38).
+        query_fastas (list): Paths of the query FASTA files.
+        output_pafs (list): Output paths, one per query.
+        sorted_dir (str): If given, queries are first sorted longest-first
+            into this cache directory (see presort_query).
+        **options: Passed to run_minimap2.
+    """
+    if sorted_dir is not None:
+        query_fastas = [presort_query(query_fasta, sorted_dir) for query_fasta in query_fastas]
+    if len(query_fastas) == 1:
+        return run_minimap2(target_fasta, query_fastas[0], output_pafs[0], **options)
+
+    # Not named *.paf, so a leftover is never picked up as an alignment
+    combined_paf = os.path.join(os.path.dirname(output_pafs[0]),
+                                f".combined_{os.getpid()}_{os.path.basename(output_pafs[0])}.part")
+    # minimap2 re-reads the query per index part and for --split-prefix merging,
+    # so the tagged queries go to a real file rather than a pipe
+    tmpdir = tempfile.mkdtemp(prefix="mm2_group_", dir=options.get("split_dir"))
+    try:
+        tagged_fasta = os.path.join(tmpdir, "queries.fa")
+        write_tagged_queries(query_fastas, tagged_fasta)
+        succeeded = run_minimap2(target_fasta, tagged_fasta, combined_paf, **options)
+        if succeeded:
+            split_tagged_output(combined_paf, output_pafs)
+            print(f"Split combined alignment into {len(output_pafs)} PAF files")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        if os.path.exists(combined_paf):
+            os.remove(combined_paf)
+    return succeeded
+
+def is_up_to_date(output_path, *input_paths):
+    """Returns True if the output and all input files exist and the output is newest."""
+    try:
+        output_mtime = os.path.getmtime(output_path)
+        return all(output_mtime >= os.path.getmtime(path) for path in input_paths)
+    except FileNotFoundError:
+        return False
+
+def sort_fasta_by_length(fasta_path, sorted_fasta_path):
+    """Writes a copy of a FASTA file with its records ordered longest-first.
+
+    minimap2 finishes a -K batch only when its longest member is done, so
+    feeding the longest contigs first avoids a long single-threaded tail.
+
+    Args:
+        fasta_path (str): Path to the input FASTA file.
+        sorted_fasta_path (str): Path to the reordered output FASTA file.
+    """
+    with open(fasta_path, "rb") as infile:
+        if os.fstat(infile.fileno()).st_size == 0:
+            open(sorted_fasta_path, "wb").close()
+            return
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            records = []  # (sequence length, start offset, end offset)
+            size = len(mm)
+            if mm[:1] == b">":
+                start = 0
+            else:
+                pos = mm.find(b"\n>")
+                start = -1 if pos == -1 else pos + 1
+            while start != -1:
+                pos = mm.find(b"\n>", start)
+                end = size if pos == -1 else pos + 1
+                header_end = mm.find(b"\n", start, end)
+                header_end = end if header_end == -1 else header_end + 1
+                length = (end - header_end) - mm[header_end:end].count(b"\n")
+                records.append((length, start, end))
+                start = -1 if pos == -1 else end
+            records.sort(key=lambda r: r[0], reverse=True)
+            tmp_path = f"{sorted_fasta_path}.tmp"
+            with open(tmp_path, "wb") as outfile:
+                for _, rec_start, rec_end in records:
+                    outfile.write(mm[rec_start:rec_end])
+                    if mm[rec_end - 1:rec_end] != b"\n":
+                        outfile.write(b"\n")
+            os.replace(tmp_path, sorted_fasta_path)
+
+def process_directories(target_fasta, input_dir, output_dir, jobs=1, threads_per_job=None,
+                        threads=None, batch_size="4g", index_batch="8g", cap_kalloc="2000m",
+                        split_dir=None, group=False):
     """Processes all FASTA files in the input directory and runs minimap2.
 
+    Alignments are fanned out over a process pool so that several moderately
+    threaded minimap2 jobs run concurrently. Queries whose PAF is already
+    newer than both the query and target FASTA are skipped, so an interrupted
+    batch can simply be rerun. The target is indexed once up front and the
+    .mmi is reused by every job. Each job aligns uncompressed queries from a
+    longest-first copy cached under ``<output_dir>/.length_sorted``; gzipped
+    queries are decompressed with pigz instead.
+
     Args:
         target_fasta (str): Path to the target (reference) FASTA file (hg38).
         input_dir (str): Path to the directory containing the de novo assembly FASTA files.
         output_dir (str): Path to the directory where the output PAF files will be saved.
+        jobs (int): Number of minimap2 invocations to run concurrently.
+        threads_per_job (int): Threads passed to each minimap2 job. Defaults to
+            the total threads divided by the number of jobs.
+        threads (int): Total threads to spread across jobs. Defaults to all
+            available cores.
+        batch_size (str): minimap2 -K value.
+        index_batch (str): minimap2 -I value.
+        cap_kalloc (str): minimap2 --cap-kalloc value.
+        split_dir (str): Parent directory for minimap2 --split-prefix files,
+            created if missing.
+        group (bool): Align several queries per minimap2 run, as many as fit
+            in one -K batch, so the target index is built once per group.
     """
     if not os.path.isdir(input_dir):
         print(f"Error: Input directory '{input_dir}' does not exist.")
         return
 
     os.makedirs(output_dir, exist_ok=True)
+    if split_dir is not None:
+        os.makedirs(split_dir, exist_ok=True)
     print(f"Processing FASTA files in: {input_dir}")
     print(f"Outputting PAF files to: {output_dir}")
 
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".fasta") or filename.endswith(".fa") or filename.endswith(".fna"):
-            query_fasta_path = os.path.join(input_dir, filename)
-            base_name = os.path.splitext(filename)[0]
-            output_paf_path = os.path.join(output_dir, f"{base_name}_vs_hg38.paf")
-            print(f"Aligning '{filename}'...")
-            run_minimap2(target_fasta, query_fasta_path, output_paf_path)
+    jobs = max(1, jobs)
+    if threads is None:
+        threads = os.cpu_count() or 1
+    if threads_per_job is None:
+        threads_per_job = max(1, threads // jobs)
+
+    in_dir = Path(input_dir)
+    out_dir = Path(output_dir)
+    sorted_dir = out_dir / ".length_sorted"
+    sorted_dir.mkdir(exist_ok=True)
+
+    worklist = []
+    with os.scandir(input_dir) as it:
+        entries = [entry for entry in it if entry.is_file()
+                   and entry.name.endswith(FASTA_SUFFIXES + COMPRESSED_FASTA_SUFFIXES)]
+    for entry in entries:
+        filename = entry.name
+        query_fasta_path = in_dir / filename
+        compressed = filename.endswith(COMPRESSED_SUFFIXES)
+        base_name = Path(query_fasta_path.stem).stem if compressed else query_fasta_path.stem
+        output_paf_path = out_dir / f"{base_name}_vs_hg38.paf"
+        if is_up_to_date(output_paf_path, query_fasta_path, target_fasta):
+            print(f"Skipping '{filename}': {output_paf_path} is up to date.")
+            continue
+        worklist.append((target_fasta, str(query_fasta_path), str(output_paf_path)))
+
+    if worklist:
+        target_index = build_minimap2_index(target_fasta, output_dir, index_batch, threads)
+        worklist = [(target_index, query, output) for _, query, output in worklist]
+
+    minimap2_options = {
+        "threads": threads_per_job,
+        "batch_size": batch_size,
+        "index_batch": index_batch,
+        "cap_kalloc": cap_kalloc,
+        "split_dir": split_dir,
+        "sorted_dir": str(sorted_dir),
+    }
+    if group:
+        groups = group_queries(worklist, parse_size(batch_size))
+    else:
+        groups = [[item] for item in worklist]
+
+    print(f"Aligning {len(worklist)} file(s) in {len(groups)} minimap2 run(s) "
+          f"with {jobs} job(s) x {threads_per_job} thread(s)")
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(run_minimap2_group, items[0][0],
+                            [query for _, query, _ in items],
+                            [output for _, _, output in items],
+                            **minimap2_options): ", ".join(os.path.basename(query) for _, query, _ in items)
+            for items in groups
+        }
+        for future in as_completed(futures):
+            queries = futures[future]
+            try:
+                if future.result():
+                    print(f"Finished aligning '{queries}'")
+                else:
+                    print(f"Failed to align '{queries}'")
+            except Exception as e:
+                print(f"Error aligning '{queries}': {e}")
             print("-" * 30)
 
 def main():
@@ -58,10 +507,32 @@ def main():
     parser.add_argument("target_fasta", help="Path to the target (reference) FASTA file (hg38).")
     parser.add_argument("input_dir", help="Path to the directory containing the de novo assembly FASTA files.")
     parser.add_argument("output_dir", help="Path to the directory where the output PAF files will be saved.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of minimap2 jobs to run concurrently (default: 1).")
+    parser.add_argument("--threads-per-job", type=int, default=None,
+                        help="Threads per minimap2 job (default: --threads // --jobs).")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(),
+                        help="Total threads available to minimap2 (default: all cores).")
+    parser.add_argument("--batch-size", default="4g",
+                        help="Query bases per minimap2 mapping batch, -K (default: 4g).")
+    parser.add_argument("--index-batch", default="8g",
+                        help="Reference bases per minimap2 index part, -I (default: 8g).")
+    parser.add_argument("--cap-kalloc", default="2000m",
+                        help="Per-thread kalloc memory cap, --cap-kalloc (default: 2000m).")
+    parser.add_argument("--split-dir", default=None,
+                        help="Directory for minimap2 --split-prefix temporary files; "
+                             "each job uses its own subdirectory (default: system temp dir).")
+    parser.add_argument("--group-queries", action="store_true",
+                        help="Align as many assemblies per minimap2 run as fit in one "
+                             "--batch-size, building the target index once per group.")
 
     args = parser.parse_args()
 
-    process_directories(args.target_fasta, args.input_dir, args.output_dir)
+    process_directories(args.target_fasta, args.input_dir, args.output_dir,
+                        jobs=args.jobs, threads_per_job=args.threads_per_job,
+                        threads=args.threads, batch_size=args.batch_size,
+                        index_batch=args.index_batch, cap_kalloc=args.cap_kalloc,
+                        split_dir=args.split_dir, group=args.group_queries)
 
 if __name__ == "__main__":
     main()
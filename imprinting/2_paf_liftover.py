@@ -1,114 +1,467 @@
 import subprocess
 import argparse
+import contextlib
+import functools
 import os
+import io
+import shutil
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pcsv
+except ImportError:  # pyarrow is optional; fall back to pandas
+    pcsv = None
+
+STREAM_BUFFER_SIZE = 1 << 20  # 1 MiB
+CHAIN_COLUMNS = 13  # Basic chain format with single mapping
+
+def is_up_to_date(output_path, *input_paths):
+    """Returns True if the output and all input files exist and the output is newest."""
+    try:
+        output_mtime = os.path.getmtime(output_path)
+        return all(output_mtime >= os.path.getmtime(path) for path in input_paths)
+    except FileNotFoundError:
+        return False
+
+def resolve_executable(name):
+    """Returns the absolute path of an executable on PATH, or name if it is not found.
+
+    The lookup happens once here, so the child no longer searches PATH on every
+    spawn. This does not change how subprocess forks: with the default
+    close_fds=True it never uses posix_spawn, and its vfork use does not depend
+    on the path. An unresolved name is returned unchanged so the usual
+    FileNotFoundError is still raised.
+    """
+    return shutil.which(name) or name
+
+def filter_chain_stream(infile, outfile, columns=CHAIN_COLUMNS, target_names=None):
+    """Copies basic single-mapping chain records from infile to outfile.
+
+    The input is consumed in STREAM_BUFFER_SIZE blocks and scanned as bytes,
+    so each block costs one read, one split and one write rather than a
+    readline and write call per record. Records are matched on their tab
+    count, which is fixed once per call; a record is only split to read its
+    tName when target_names is given.
+
+    Args:
+        infile: Binary file object to read chain records from.
+        outfile: Binary file object to write the kept records to.
+        columns (int): Number of columns a record must have to be kept.
+        target_names (set): Optional set of target (hg38) sequence names as
+            bytes; records on any other target are dropped.
+    """
+    tabs = columns - 1
+
+    def keep(line):
+        # Skip comments and keep only basic single-mapping records
+        if line[:1] == b"#" or line.count(b"\t") != tabs:
+            return False
+        return target_names is None or line.split(b"\t", 3)[2] in target_names
+
+    remainder = b""
+    while True:
+        block = infile.read(STREAM_BUFFER_SIZE)
+        if not block:
+            break
+        lines = (remainder + block).split(b"\n")
+        remainder = lines.pop()
+        kept = [line for line in lines if keep(line)]
+        if kept:
+            outfile.write(b"\n".join(kept))
+            outfile.write(b"\n")
+    if keep(remainder):
+        outfile.write(remainder)
+        outfile.write(b"\n")
+
 def run_paf2liftover(paf_file, chain_file):
     """Converts a PAF file to a chain file using paf2liftover.py.
 
+    The tool writes to stdout and its output is filtered as it streams in, so
+    the chain data is written to disk exactly once. It goes to a temporary
+    file that replaces chain_file only on success.
+
     Args:
         paf_file (str): Path to the input PAF file.
         chain_file (str): Path to the output chain file.
     """
+    tmp_chain_file = f"{chain_file}.tmp"
     try:
         command = [
-            "paf2liftover.py",
+            resolve_executable("paf2liftover.py"),
             "--no-chains",  # Exclude chain format output
             "--best-only",  # Keep only the best alignment for each query
             paf_file,
-            chain_file + ".tmp"  # Temporary output before filtering
+            "/dev/stdout"  # Stream output so it can be filtered on the fly
         ]
         print(f"Running paf2liftover.py (best-only) for: {paf_file}")
-        subprocess.run(command, check=True, capture_output=True, text=True)
+        with tempfile.TemporaryFile() as errfile:
+            with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errfile,
+                                  bufsize=STREAM_BUFFER_SIZE) as proc, \
+                    io.BufferedWriter(io.FileIO(tmp_chain_file, "w"),
+                                      buffer_size=STREAM_BUFFER_SIZE) as outfile:
+                filter_chain_stream(proc.stdout, outfile)
+            if proc.returncode != 0:
+                errfile.seek(0)
+                raise subprocess.CalledProcessError(proc.returncode, command, stderr=errfile.read())
+        os.replace(tmp_chain_file, chain_file)
 
-        # Filter the temporary output to create the final chain file
-        with open(chain_file + ".tmp", "r") as infile, open(chain_file, "w") as outfile:
-            for line in infile:
-                if not line.startswith("#") and line.strip():  # Skip comments and empty lines
-                    parts = line.split('\t')
-                    if len(parts) == 13:  # Basic chain format with single mapping
-                        outfile.write(line)
-
-        os.remove(chain_file + ".tmp")
         print(f"Successfully generated filtered chain file: {chain_file}")
 
     except subprocess.CalledProcessError as e:
+        if os.path.exists(chain_file):
+            os.remove(chain_file)
         print(f"Error running paf2liftover.py: {e}")
-        print(f"Stdout: {e.stdout}")
-        print(f"Stderr: {e.stderr}")
+        print(f"Stderr: {e.stderr.decode(errors='replace')}")
     except FileNotFoundError:
         print("Error: paf2liftover.py not found in your PATH. "
               "Make sure the cactus toolkit is installed and the script is accessible.")
+    finally:
+        if os.path.exists(tmp_chain_file):
+            os.remove(tmp_chain_file)
+
+@functools.lru_cache(maxsize=None)
+def read_bed_chromosomes(bed_file):
+    """Returns the set of chromosome names (as bytes) used in a BED file."""
+    with open(bed_file, "rb") as infile:
+        return frozenset(line.split(b"\t", 1)[0] for line in infile if line.strip())
+
+def split_bed_file(bed_file, shards):
+    """Splits a BED file into contiguous shards of roughly equal line count.
+
+    Args:
+        bed_file (str): Path to the BED file to split.
+        shards (int): Number of shards to produce.
+
+    Returns:
+        list: Paths of the shard files, or [bed_file] if no split is needed.
+    """
+    with open(bed_file, "rb") as infile:
+        lines = infile.readlines()
+    shards = min(max(1, shards), len(lines))
+    if shards <= 1:
+        return [bed_file]
+    shard_files = []
+    size, extra = divmod(len(lines), shards)
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        shard_file = f"{bed_file}.part{i}"
+        with open(shard_file, "wb") as outfile:
+            outfile.writelines(lines[start:end])
+        shard_files.append(shard_file)
+        start = end
+    return shard_files
+
+def liftover_part_paths(output_bed, unmapped_bed, shards):
+    """Returns the temporary (output, unmapped) paths each liftOver shard writes to."""
+    if shards <= 1:
+        return [(f"{output_bed}.tmp", f"{unmapped_bed}.tmp")]
+    return [(f"{output_bed}.part{i}", f"{unmapped_bed}.part{i}") for i in range(shards)]
 
-def run_liftover(bed_file, chain_file, output_bed, unmapped_bed):
+def merge_liftover_parts(parts, output_bed, unmapped_bed):
+    """Moves per-shard liftOver outputs into place, concatenated in shard order.
+
+    Each final file is written under a temporary name and renamed, the lifted
+    BED last, so an interrupted merge never leaves an output that looks up to
+    date.
+    """
+    for final, index in ((unmapped_bed, 1), (output_bed, 0)):
+        if len(parts) == 1:
+            os.replace(parts[0][index], final)
+            continue
+        tmp_path = f"{final}.tmp"
+        with open(tmp_path, "wb") as outfile:
+            for part in parts:
+                with open(part[index], "rb") as infile:
+                    shutil.copyfileobj(infile, outfile, STREAM_BUFFER_SIZE)
+        os.replace(tmp_path, final)
+    remove_liftover_parts(parts)
+
+def remove_liftover_parts(parts):
+    """Removes leftover per-shard liftOver outputs."""
+    for part in parts:
+        for path in part:
+            if os.path.exists(path):
+                os.remove(path)
+
+def report_unmapped(unmapped_bed):
+    """Prints where unmapped intervals were written, if there were any."""
+    if os.path.exists(unmapped_bed) and os.stat(unmapped_bed).st_size > 0:
+        print(f"Unmapped intervals saved to: {unmapped_bed}")
+    else:
+        print("No intervals were unmapped.")
+
+def run_liftover(bed_file, chain_file, output_bed, unmapped_bed, bed_shards=None):
     """Runs the liftOver utility.
 
+    The chain is first reduced to the records whose target chromosome occurs
+    in bed_file, since liftOver scans the whole chain. When bed_shards is
+    given, one liftOver process is run per shard in parallel and their
+    outputs are concatenated in shard order.
+
     Args:
         bed_file (str): Path to the input BED file (hg38 imprinted loci).
         chain_file (str): Path to the chain file.
         output_bed (str): Path to the output BED file with lifted-over coordinates.
         unmapped_bed (str): Path to the output BED file for unmapped intervals.
+        bed_shards (list): Optional shard files of bed_file (see split_bed_file).
     """
+    shards = bed_shards or [bed_file]
+    parts = liftover_part_paths(output_bed, unmapped_bed, len(shards))
+    filtered_chain_file = f"{chain_file}.filtered"
     try:
-        command = [
-            "liftOver",
-            bed_file,
-            chain_file,
-            output_bed,
-            unmapped_bed
+        with open(chain_file, "rb") as infile, \
+                io.BufferedWriter(io.FileIO(filtered_chain_file, "w"),
+                                  buffer_size=STREAM_BUFFER_SIZE) as outfile:
+            filter_chain_stream(infile, outfile, target_names=read_bed_chromosomes(bed_file))
+        commands = [
+            [
+                resolve_executable("liftOver"),
+                shard,
+                filtered_chain_file,
+                part_bed,
+                part_unmapped
+            ]
+            for shard, (part_bed, part_unmapped) in zip(shards, parts)
         ]
-        print(f"Running liftOver for chain file: {chain_file}")
-        subprocess.run(command, check=True)
+        print(f"Running liftOver for chain file: {chain_file} ({len(commands)} shard(s))")
+        procs = []
+        try:
+            for command in commands:
+                procs.append(subprocess.Popen(command))
+            for proc, command in zip(procs, commands):
+                if proc.wait() != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, command)
+        finally:
+            # Stop the remaining shards so none outlives the part cleanup below
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+        merge_liftover_parts(parts, output_bed, unmapped_bed)
         print(f"Successfully generated lifted-over BED file: {output_bed}")
-        if os.path.exists(unmapped_bed) and os.stat(unmapped_bed).st_size > 0:
-            print(f"Unmapped intervals saved to: {unmapped_bed}")
-        else:
-            print("No intervals were unmapped.")
+        report_unmapped(unmapped_bed)
     except subprocess.CalledProcessError as e:
+        # Never leave a partial result behind that would look up to date
+        if os.path.exists(output_bed):
+            os.remove(output_bed)
         print(f"Error running liftOver: {e}")
     except FileNotFoundError:
         print("Error: liftOver not found in your PATH. "
               "Make sure the UCSC Genome Browser utilities are installed and liftOver is accessible.")
+    finally:
+        remove_liftover_parts(parts)
+        if os.path.exists(filtered_chain_file):
+            os.remove(filtered_chain_file)
+
+class _TeeWriter:
+    """Minimal binary writer that duplicates every write to several streams."""
+
+    def __init__(self, streams):
+        self.streams = streams
+
+    def write(self, data):
+        for stream in self.streams:
+            stream.write(data)
+
+def run_paf2liftover_piped(paf_file, bed_file, output_bed, unmapped_bed, bed_shards=None):
+    """Runs paf2liftover.py and liftOver as one pipeline without a chain file.
+
+    paf2liftover.py output is filtered in-process and fed to liftOver on
+    stdin, so the chain never touches disk. With bed_shards, the same chain
+    stream is fanned out to one liftOver process per shard. Only records on
+    chromosomes present in bed_file are passed on.
+
+    Args:
+        paf_file (str): Path to the input PAF file.
+        bed_file (str): Path to the input BED file (hg38 imprinted loci).
+        output_bed (str): Path to the output BED file with lifted-over coordinates.
+        unmapped_bed (str): Path to the output BED file for unmapped intervals.
+        bed_shards (list): Optional shard files of bed_file (see split_bed_file).
+    """
+    paf2liftover_command = [
+        resolve_executable("paf2liftover.py"),
+        "--no-chains",  # Exclude chain format output
+        "--best-only",  # Keep only the best alignment for each query
+        paf_file,
+        "/dev/stdout"
+    ]
+    shards = bed_shards or [bed_file]
+    parts = liftover_part_paths(output_bed, unmapped_bed, len(shards))
+    liftover_commands = [
+        [resolve_executable("liftOver"), shard, "/dev/stdin", part_bed, part_unmapped]
+        for shard, (part_bed, part_unmapped) in zip(shards, parts)
+    ]
+    print(f"Running paf2liftover.py | liftOver for: {paf_file} ({len(shards)} shard(s))")
+    try:
+        with tempfile.TemporaryFile() as errfile:
+            try:
+                with subprocess.Popen(paf2liftover_command, stdout=subprocess.PIPE, stderr=errfile,
+                                      bufsize=STREAM_BUFFER_SIZE) as producer:
+                    try:
+                        # Each Popen context waits for its liftOver on exit, so no
+                        # shard outlives the part cleanup below
+                        with contextlib.ExitStack() as stack:
+                            consumers = [
+                                stack.enter_context(subprocess.Popen(command, stdin=subprocess.PIPE,
+                                                                     bufsize=STREAM_BUFFER_SIZE))
+                                for command in liftover_commands
+                            ]
+                            try:
+                                filter_chain_stream(producer.stdout,
+                                                    _TeeWriter([c.stdin for c in consumers]),
+                                                    target_names=read_bed_chromosomes(bed_file))
+                            except BrokenPipeError:
+                                producer.kill()  # liftOver exited early; its return code is checked below
+                            finally:
+                                for consumer in consumers:
+                                    try:
+                                        consumer.stdin.close()
+                                    except BrokenPipeError:
+                                        pass
+                    except FileNotFoundError:
+                        producer.kill()
+                        print("Error: liftOver not found in your PATH. "
+                              "Make sure the UCSC Genome Browser utilities are installed and liftOver is accessible.")
+                        return
+            except FileNotFoundError:
+                print("Error: paf2liftover.py not found in your PATH. "
+                      "Make sure the cactus toolkit is installed and the script is accessible.")
+                return
+
+            failed = [(c.returncode, command) for c, command in zip(consumers, liftover_commands)
+                      if c.returncode != 0]
+            if failed or producer.returncode != 0:
+                # Never leave a partial result behind that would look up to date
+                if os.path.exists(output_bed):
+                    os.remove(output_bed)
+                if failed:
+                    print(f"Error running liftOver: {subprocess.CalledProcessError(*failed[0])}")
+                else:
+                    errfile.seek(0)
+                    print(f"Error running paf2liftover.py: "
+                          f"{subprocess.CalledProcessError(producer.returncode, paf2liftover_command)}")
+                    print(f"Stderr: {errfile.read().decode(errors='replace')}")
+                return
+
+        merge_liftover_parts(parts, output_bed, unmapped_bed)
+    finally:
+        remove_liftover_parts(parts)
+
+    print(f"Successfully generated lifted-over BED file: {output_bed}")
+    report_unmapped(unmapped_bed)
 
 def create_hg38_bed(imprinted_loci_tsv, output_bed):
     """Creates a BED file from the imprinted loci TSV file (assuming hg38 coordinates).
 
+    Uses pyarrow's CSV reader and compute kernels when available, and pandas
+    otherwise.
+
     Args:
         imprinted_loci_tsv (str): Path to the Imprinted_DMR_List_V1.tsv file.
         output_bed (str): Path to the output BED file.
     """
     try:
-        df = pd.read_csv(imprinted_loci_tsv, sep='\t')
-        bed_df = df[['Chromosome', 'Start', 'End']].copy()
-        bed_df['Chromosome'] = 'chr' + bed_df['Chromosome'].astype(str)
-        bed_df.to_csv(output_bed, sep='\t', header=False, index=False)
+        if pcsv is not None:
+            # Only convert the three BED columns; other columns are never type-inferred
+            tbl = pcsv.read_csv(imprinted_loci_tsv,
+                                parse_options=pcsv.ParseOptions(delimiter='\t'),
+                                convert_options=pcsv.ConvertOptions(
+                                    include_columns=['Chromosome', 'Start', 'End']))
+            chrom = pc.binary_join_element_wise('chr', tbl['Chromosome'].cast(pa.string()), '')
+            tbl = tbl.set_column(0, 'Chromosome', chrom)
+            pcsv.write_csv(tbl, output_bed,
+                           write_options=pcsv.WriteOptions(delimiter='\t', include_header=False,
+                                                           quoting_style='none'))
+        else:
+            # Only parse the three BED columns; usecols raises ValueError if one is missing
+            df = pd.read_csv(imprinted_loci_tsv, sep='\t',
+                             usecols=['Chromosome', 'Start', 'End'],
+                             dtype={'Chromosome': 'string', 'Start': 'int64', 'End': 'int64'},
+                             engine='c')
+            arr = np.column_stack([
+                ('chr' + df['Chromosome']).to_numpy(dtype=object),
+                df['Start'].to_numpy(np.int64),
+                df['End'].to_numpy(np.int64),
+            ])
+            np.savetxt(output_bed, arr, fmt='%s\t%d\t%d')
         print(f"Successfully created hg38 BED file: {output_bed}")
         return output_bed
     except FileNotFoundError:
         print(f"Error: Imprinted loci TSV file not found: {imprinted_loci_tsv}")
-    except KeyError as e:
+    except (KeyError, ValueError) as e:
         print(f"Error: Required column not found in TSV file: {e}. "
               "Please ensure the TSV has 'Chromosome', 'Start', and 'End' columns.")
     return None
 
-def process_paf_directory(paf_dir, output_bed_dir, unmapped_bed_dir, hg38_bed_file):
-    """Processes all PAF files in the given directory."""
-    for filename in os.listdir(paf_dir):
-        if filename.endswith(".paf"):
-            assembly_name = filename.replace(".paf", "")
-            paf_file = os.path.join(paf_dir, filename)
-            chain_file = os.path.join(output_bed_dir, f"{assembly_name}_to_hg38.chain")
-            lifted_over_bed = os.path.join(output_bed_dir, f"{assembly_name}_imprinted_loci.bed")
-            unmapped_bed = os.path.join(unmapped_bed_dir, f"{assembly_name}_unmapped.bed")
-
-            # Run paf2liftover with options to handle one-to-many/many-to-one
-            run_paf2liftover(paf_file, chain_file)
+def process_paf_directory(paf_dir, output_bed_dir, unmapped_bed_dir, hg38_bed_file, jobs=1,
+                          keep_chain=False, bed_shards=None):
+    """Processes all PAF files in the given directory.
+
+    Each PAF is handled independently on a thread pool; the work is dominated
+    by the external tools, so threads are enough to overlap them. A failure
+    in one PAF is reported without stopping the rest of the batch. Steps whose
+    outputs are already newer than their inputs are skipped.
+
+    By default the chain is piped straight from paf2liftover.py into liftOver;
+    with keep_chain=True it is written to output_bed_dir first. bed_shards,
+    if given, are lifted over in parallel and merged per assembly.
+    """
+    with os.scandir(paf_dir) as it:
+        entries = [entry for entry in it if entry.is_file() and entry.name.endswith(".paf")]
+
+    in_dir = Path(paf_dir)
+    bed_dir = Path(output_bed_dir)
+    unmapped_dir = Path(unmapped_bed_dir)
+
+    def _one(entry):
+        assembly_name = Path(entry.name).stem
+        paf_file = str(in_dir / entry.name)
+        chain_file = str(bed_dir / f"{assembly_name}_to_hg38.chain")
+        lifted_over_bed = str(bed_dir / f"{assembly_name}_imprinted_loci.bed")
+        unmapped_bed = str(unmapped_dir / f"{assembly_name}_unmapped.bed")
 
-            # Run liftOver
-            if os.path.exists(chain_file):
-                run_liftover(hg38_bed_file, chain_file, lifted_over_bed, unmapped_bed)
+        if not keep_chain:
+            if is_up_to_date(lifted_over_bed, paf_file, hg38_bed_file):
+                print(f"Lifted-over BED file is up to date: {lifted_over_bed}")
             else:
-                print(f"Chain file not generated for {assembly_name}. Skipping liftOver.")
+                run_paf2liftover_piped(paf_file, hg38_bed_file, lifted_over_bed, unmapped_bed,
+                                       bed_shards=bed_shards)
+            return
+
+        # Run paf2liftover with options to handle one-to-many/many-to-one
+        if is_up_to_date(chain_file, paf_file):
+            print(f"Chain file is up to date: {chain_file}")
+        else:
+            run_paf2liftover(paf_file, chain_file)
+
+        # Run liftOver
+        if is_up_to_date(lifted_over_bed, chain_file, hg38_bed_file):
+            print(f"Lifted-over BED file is up to date: {lifted_over_bed}")
+        elif os.path.exists(chain_file):
+            run_liftover(hg38_bed_file, chain_file, lifted_over_bed, unmapped_bed,
+                         bed_shards=bed_shards)
+        else:
+            print(f"Chain file not generated for {assembly_name}. Skipping liftOver.")
+
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {executor.submit(_one, entry): entry.name for entry in entries}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors[futures[future]] = e
+
+    for filename, error in sorted(errors.items()):
+        print(f"Error processing '{filename}': {error}")
+    return errors
 
 def main():
     parser = argparse.ArgumentParser(description="Liftover hg38 imprinted loci coordinates to de novo assemblies using PAF alignments, handling one-to-many mappings.")
@@ -116,6 +469,14 @@ def main():
     parser.add_argument("output_bed_dir", help="Directory to save the lifted-over BED files.")
     parser.add_argument("unmapped_bed_dir", help="Directory to save the unmapped intervals BED files.")
     parser.add_argument("imprinted_loci_tsv", help="Path to the Imprinted_DMR_List_V1.tsv file (hg38 coordinates).")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of PAF files to process concurrently (default: 1).")
+    parser.add_argument("--keep-chain", action="store_true",
+                        help="Write each chain file to disk before running liftOver "
+                             "instead of piping it directly.")
+    parser.add_argument("--liftover-shards", type=int, default=1,
+                        help="Split the hg38 BED into this many shards and run one liftOver "
+                             "per shard in parallel; each loads the full chain (default: 1).")
 
     args = parser.parse_args()
 
@@ -127,13 +488,20 @@ def main():
     hg38_bed_file = create_hg38_bed(args.imprinted_loci_tsv, hg38_bed_file)
     if not hg38_bed_file:
         return
+    # The BED is regenerated on every run; stamp it with the TSV's mtime so that
+    # lifted-over outputs are only considered stale when the loci actually change.
+    tsv_mtime = os.path.getmtime(args.imprinted_loci_tsv)
+    os.utime(hg38_bed_file, (tsv_mtime, tsv_mtime))
+    bed_shards = split_bed_file(hg38_bed_file, args.liftover_shards)
 
     # Process all PAF files in the specified directory
-    process_paf_directory(args.paf_dir, args.output_bed_dir, args.unmapped_bed_dir, hg38_bed_file)
+    process_paf_directory(args.paf_dir, args.output_bed_dir, args.unmapped_bed_dir, hg38_bed_file,
+                          jobs=args.jobs, keep_chain=args.keep_chain, bed_shards=bed_shards)
 
-    # Clean up the temporary hg38 BED file
-    if os.path.exists(hg38_bed_file):
-        os.remove(hg38_bed_file)
+    # Clean up the temporary hg38 BED file and its shards
+    for bed_file in {hg38_bed_file, *bed_shards}:
+        if os.path.exists(bed_file):
+            os.remove(bed_file)
 
 if __name__ == "__main__":
     main()